@@ -1,17 +1,21 @@
 """Ijai map image parser."""
 
 import logging
+from typing import Callable
 
+import numpy as np
+import numpy.typing as npt
 from PIL import Image
 from PIL.Image import Image as ImageType
 from PIL.Image import Resampling
 
-from vacuum_map_parser_base.config.color import ColorsPalette, SupportedColor
+from vacuum_map_parser_base.config.color import Color, ColorsPalette, SupportedColor
 from vacuum_map_parser_base.config.drawable import Drawable
 from vacuum_map_parser_base.config.image_config import ImageConfig
 from vacuum_map_parser_base.map_data import Point
 
 from .parsing_buffer import ParsingBuffer
+from .pixel_classifier import classify_pixels
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -33,17 +37,20 @@ class IjaiImageParser:
         self._palette = palette
         self._image_config = image_config
         self._drawables = drawables
+        self._color_lut, self._known_pixel_types = self._create_color_lut()
+        self._room_lut, self._cleaned_lut = IjaiImageParser._create_room_lut()
+        self._cleaned_area_color = np.array(
+            IjaiImageParser._to_rgba(palette.get_color(SupportedColor.CLEANED_AREA)), dtype=np.uint8)
 
     def parse(
         self, buf: ParsingBuffer, width: int, height: int
-    ) -> tuple[ImageType | None, dict[int, tuple[int, int, int, int]], set[int], ImageType | None]:
-        color_map = {\
-                    IjaiImageParser.MAP_OUTSIDE: self._palette.get_color(SupportedColor.MAP_OUTSIDE),\
-                    IjaiImageParser.MAP_WALL:self._palette.get_color(SupportedColor.MAP_WALL_V2),\
-                    IjaiImageParser.MAP_SCAN:  self._palette.get_color(SupportedColor.SCAN),\
-                    IjaiImageParser.MAP_NEW_DISCOVERED_AREA:  self._palette.get_color(SupportedColor.NEW_DISCOVERED_AREA)}
-        rooms = {}
-        cleaned_areas = set()
+    ) -> tuple[
+        ImageType | None,
+        dict[int, tuple[int, int, int, int]],
+        set[int],
+        ImageType | None,
+        npt.NDArray[np.uint8] | None,
+    ]:
         scale = self._image_config.scale
         trim_left = int(self._image_config.trim.left * width / 100)
         trim_right = int(self._image_config.trim.right * width / 100)
@@ -52,62 +59,159 @@ class IjaiImageParser:
         trimmed_height = height - trim_top - trim_bottom
         trimmed_width = width - trim_left - trim_right
         if trimmed_width == 0 or trimmed_height == 0:
-            return None, {}, set(), None
-        image = Image.new('RGBA', (trimmed_width, trimmed_height))
-        pixels = image.load()
+            return None, {}, set(), None, None
         cleaned_areas_layer = None
-        cleaned_areas_pixels = None
         draw_cleaned_area = Drawable.CLEANED_AREA in self._drawables
-        if draw_cleaned_area:
-            cleaned_areas_layer = Image.new("RGBA", (trimmed_width, trimmed_height))
-            cleaned_areas_pixels = cleaned_areas_layer.load()
-        _LOGGER.debug(f"trim_bottom = {trim_bottom}, trim_top = {trim_top}, trim_left = {trim_left}, trim_right = {trim_right}")
-        buf.skip('trim_bottom', trim_bottom * width)
-        unknown_pixels = set()
-        for img_y in range(trimmed_height):
-            buf.skip('trim_left', trim_left)
-            for img_x in range(trimmed_width):
-                pixel_type = buf.get_uint8('pixel')
-                x = img_x
-                y = trimmed_height - 1 - img_y
-                if pixel_type in color_map.keys():
-                    pixels[x, y] = color_map[pixel_type]
-                elif IjaiImageParser.MAP_ROOM_MIN <= pixel_type <= IjaiImageParser.MAP_SELECTED_ROOM_MAX:
-                    room_x = img_x + trim_left
-                    room_y = img_y + trim_bottom
-                    if pixel_type < IjaiImageParser.MAP_SELECTED_ROOM_MIN:
-                        room_number = pixel_type
-                    else:
-                        room_number = pixel_type - IjaiImageParser.MAP_SELECTED_ROOM_MIN + IjaiImageParser.MAP_ROOM_MIN
-                        cleaned_areas.add(room_number)
-                        if draw_cleaned_area:
-                            cleaned_areas_pixels[x, y] = IjaiImageParser.get_color(SupportedColor.CLEANED_AREA)
-                    if room_number not in rooms:
-                        rooms[room_number] = (room_x, room_y, room_x, room_y)
-                    else:
-                        rooms[room_number] = (min(rooms[room_number][0], room_x),
-                                              min(rooms[room_number][1], room_y),
-                                              max(rooms[room_number][2], room_x),
-                                              max(rooms[room_number][3], room_y))
-                    pixels[x, y] = self._palette.get_room_color(room_number)
-                else:
-                    pixels[x, y] = IjaiImageParser.get_color(SupportedColor.UNKNOWN)
-                    unknown_pixels.add(pixel_type)
-                    _LOGGER.debug(f"unknown pixel [{x},{y}] = {pixel_type}")
-            buf.skip('trim_right', trim_right)
-        buf.skip('trim_top', trim_top * width)
-        if self._image_config.scale != 1 and trimmed_width != 0 and trimmed_height != 0:
-            image = image.resize((int(trimmed_width * scale), int(trimmed_height * scale)), resample=Resampling.NEAREST)
-            if draw_cleaned_area:
-                cleaned_areas_layer = cleaned_areas_layer.resize(
-                    (int(trimmed_width * scale), int(trimmed_height * scale)), resample=Image.NEAREST)
+        _LOGGER.debug(
+            "trim_bottom = %d, trim_top = %d, trim_left = %d, trim_right = %d",
+            trim_bottom,
+            trim_top,
+            trim_left,
+            trim_right,
+        )
+        # a zero-copy view of the map data, with rows in storage order (bottom-up)
+        pixel_types = buf.get_array('image', np.uint8, width * height).reshape(height, width)
+        has_trim = trim_left or trim_right or trim_top or trim_bottom
+        trimmed = pixel_types
+        if has_trim:
+            trimmed = pixel_types[trim_bottom:height - trim_top, trim_left:width - trim_right]
+        if classify_pixels is not None:
+            image_rgba, rooms_trimmed, cleaned_areas, cleaned_areas_rgba, pixel_types_present = \
+                self._classify_compiled(classify_pixels, trimmed, draw_cleaned_area)
+        else:
+            image_rgba, rooms_trimmed, cleaned_areas, cleaned_areas_rgba, pixel_types_present = \
+                self._classify_vectorized(trimmed, draw_cleaned_area)
+        image = Image.fromarray(image_rgba)
+        if cleaned_areas_rgba is not None:
+            cleaned_areas_layer = Image.fromarray(cleaned_areas_rgba)
+        rooms = rooms_trimmed
+        if has_trim:
+            rooms = {
+                number: (x0 + trim_left, y0 + trim_bottom, x1 + trim_left, y1 + trim_bottom)
+                for number, (x0, y0, x1, y1) in rooms_trimmed.items()
+            }
+        if scale != 1:
+            # image is a zero-copy view of image_rgba, so Pillow's nearest-neighbour resize is the only copy made
+            scaled_size = (int(trimmed_width * scale), int(trimmed_height * scale))
+            image = image.resize(scaled_size, resample=Resampling.NEAREST)
+            if cleaned_areas_layer is not None:
+                cleaned_areas_layer = cleaned_areas_layer.resize(scaled_size, resample=Resampling.NEAREST)
+        unknown_pixels = set(
+            pixel_type for pixel_type in pixel_types_present if not self._known_pixel_types[pixel_type])
         if len(unknown_pixels) > 0:
             _LOGGER.warning('unknown pixel_types: %s', unknown_pixels)
-        return image, rooms, cleaned_areas, cleaned_areas_layer
+        return image, rooms, cleaned_areas, cleaned_areas_layer, pixel_types
+
+    def _classify_vectorized(self, trimmed: npt.NDArray[np.uint8], draw_cleaned_area: bool) -> tuple[
+        npt.NDArray[np.uint8], dict[int, tuple[int, int, int, int]], set[int], npt.NDArray[np.uint8] | None, list[int]
+    ]:
+        # rows are stored bottom-up, the image is drawn top-down
+        image_rgba = self._color_lut[trimmed[::-1]]
+        pixel_types_present = np.flatnonzero(np.bincount(trimmed.ravel(), minlength=256))
+        room_numbers_present = self._room_lut[pixel_types_present]
+        rooms = {}
+        room_numbers = self._room_lut[trimmed]
+        for room_number in np.unique(room_numbers_present[room_numbers_present != 0]).tolist():
+            room_pixels = room_numbers == room_number
+            room_ys = np.flatnonzero(room_pixels.any(axis=1))
+            room_xs = np.flatnonzero(room_pixels.any(axis=0))
+            rooms[room_number] = (int(room_xs[0]), int(room_ys[0]), int(room_xs[-1]), int(room_ys[-1]))
+        cleaned_areas = set(room_numbers_present[self._cleaned_lut[pixel_types_present]].tolist())
+        cleaned_areas_rgba = None
+        if draw_cleaned_area:
+            cleaned_areas_rgba = np.zeros(image_rgba.shape, dtype=np.uint8)
+            cleaned_areas_rgba[self._cleaned_lut[trimmed[::-1]]] = self._cleaned_area_color
+        return image_rgba, rooms, cleaned_areas, cleaned_areas_rgba, pixel_types_present.tolist()
+
+    def _classify_compiled(
+        self, kernel: Callable[..., None], trimmed: npt.NDArray[np.uint8], draw_cleaned_area: bool
+    ) -> tuple[
+        npt.NDArray[np.uint8], dict[int, tuple[int, int, int, int]], set[int], npt.NDArray[np.uint8] | None, list[int]
+    ]:
+        height, width = trimmed.shape
+        image_rgba = np.empty((height, width, 4), dtype=np.uint8)
+        cleaned_areas_rgba = np.zeros((height if draw_cleaned_area else 0, width, 4), dtype=np.uint8)
+        room_bounds = np.empty((IjaiImageParser.MAP_ROOM_MAX + 1, 4), dtype=np.int32)
+        room_bounds[:] = (width, height, -1, -1)
+        cleaned_rooms = np.zeros(IjaiImageParser.MAP_ROOM_MAX + 1, dtype=np.bool_)
+        pixel_counts = np.zeros(256, dtype=np.int64)
+        kernel(
+            np.ascontiguousarray(trimmed),
+            self._color_lut,
+            self._room_lut,
+            self._cleaned_lut,
+            self._cleaned_area_color,
+            image_rgba,
+            cleaned_areas_rgba,
+            room_bounds,
+            cleaned_rooms,
+            pixel_counts,
+        )
+        rooms = {
+            room_number: (
+                int(room_bounds[room_number, 0]),
+                int(room_bounds[room_number, 1]),
+                int(room_bounds[room_number, 2]),
+                int(room_bounds[room_number, 3]),
+            )
+            for room_number in np.flatnonzero(room_bounds[:, 2] >= 0).tolist()
+        }
+        return (
+            image_rgba,
+            rooms,
+            set(np.flatnonzero(cleaned_rooms).tolist()),
+            cleaned_areas_rgba if draw_cleaned_area else None,
+            np.flatnonzero(pixel_counts).tolist(),
+        )
+
+    def _create_color_lut(self) -> tuple[npt.NDArray[np.uint8], npt.NDArray[np.bool_]]:
+        """Create a lookup table of RGBA colors indexed by pixel type, along with a mask of known pixel types."""
+        lut = np.empty((256, 4), dtype=np.uint8)
+        known = np.zeros(256, dtype=np.bool_)
+        lut[:] = IjaiImageParser._to_rgba(self._palette.get_color(SupportedColor.UNKNOWN))
+        color_map = {
+            IjaiImageParser.MAP_OUTSIDE: self._palette.get_color(SupportedColor.MAP_OUTSIDE),
+            IjaiImageParser.MAP_WALL: self._palette.get_color(SupportedColor.MAP_WALL_V2),
+            IjaiImageParser.MAP_SCAN: self._palette.get_color(SupportedColor.SCAN),
+            IjaiImageParser.MAP_NEW_DISCOVERED_AREA: self._palette.get_color(SupportedColor.NEW_DISCOVERED_AREA),
+        }
+        for pixel_type in range(IjaiImageParser.MAP_ROOM_MIN, IjaiImageParser.MAP_SELECTED_ROOM_MAX + 1):
+            room_number = pixel_type
+            if pixel_type >= IjaiImageParser.MAP_SELECTED_ROOM_MIN:
+                room_number = pixel_type - IjaiImageParser.MAP_SELECTED_ROOM_MIN + IjaiImageParser.MAP_ROOM_MIN
+            color_map[pixel_type] = self._palette.get_room_color(room_number)
+        for pixel_type, color in color_map.items():
+            lut[pixel_type] = IjaiImageParser._to_rgba(color)
+            known[pixel_type] = True
+        return lut, known
+
+    @staticmethod
+    def _create_room_lut() -> tuple[npt.NDArray[np.uint8], npt.NDArray[np.bool_]]:
+        """Create a lookup table of room numbers indexed by pixel type (0 for non-room pixels), along with a mask of
+        pixel types marking selected (cleaned) rooms."""
+        room_lut = np.zeros(256, dtype=np.uint8)
+        cleaned_lut = np.zeros(256, dtype=np.bool_)
+        room_lut[IjaiImageParser.MAP_ROOM_MIN:IjaiImageParser.MAP_ROOM_MAX + 1] = np.arange(
+            IjaiImageParser.MAP_ROOM_MIN, IjaiImageParser.MAP_ROOM_MAX + 1)
+        room_lut[IjaiImageParser.MAP_SELECTED_ROOM_MIN:IjaiImageParser.MAP_SELECTED_ROOM_MAX + 1] = np.arange(
+            IjaiImageParser.MAP_ROOM_MIN, IjaiImageParser.MAP_ROOM_MAX + 1)
+        cleaned_lut[IjaiImageParser.MAP_SELECTED_ROOM_MIN:IjaiImageParser.MAP_SELECTED_ROOM_MAX + 1] = True
+        return room_lut, cleaned_lut
+
+    @staticmethod
+    def _to_rgba(color: Color) -> tuple[int, int, int, int]:
+        if len(color) == 4:
+            return color
+        return color[0], color[1], color[2], 255
 
     @staticmethod
-    def get_current_vacuum_room(buf: ParsingBuffer, vacuum_position_on_image: Point) -> int | None:
-        pixel_type = buf.get_at_image(int(vacuum_position_on_image.y) * 800 + int(vacuum_position_on_image.x))
+    def get_current_vacuum_room(pixel_types: npt.NDArray[np.uint8], vacuum_position_on_image: Point) -> int | None:
+        x = int(vacuum_position_on_image.x)
+        y = int(vacuum_position_on_image.y)
+        height, width = pixel_types.shape
+        if not (0 <= x < width and 0 <= y < height):
+            return None
+        pixel_type = int(pixel_types[y, x])
         if IjaiImageParser.MAP_ROOM_MIN <= pixel_type <= IjaiImageParser.MAP_ROOM_MAX:
             return pixel_type
         if IjaiImageParser.MAP_SELECTED_ROOM_MIN <= pixel_type <= IjaiImageParser.MAP_SELECTED_ROOM_MAX:
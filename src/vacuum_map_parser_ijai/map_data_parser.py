@@ -5,6 +5,8 @@ import math
 import zlib
 from typing import Any
 
+import numpy as np
+import numpy.typing as npt
 from vacuum_map_parser_base.config.color import ColorsPalette
 from vacuum_map_parser_base.config.drawable import Drawable
 from vacuum_map_parser_base.config.image_config import ImageConfig
@@ -19,6 +21,14 @@ from .aes_decryptor import decrypt
 
 _LOGGER = logging.getLogger(__name__)
 
+_RAD2DEG = 180 / math.pi
+
+# initial zlib output buffer, an unpacked 800x800 map does not fit into the 16 KiB default
+_UNPACK_BUFSIZE = 1 << 20
+
+# mode (0: taxi, 1: working) followed by the position
+_HISTORY_POINT = np.dtype([("mode", np.uint8), ("x", "<f4"), ("y", "<f4")])
+
 
 class IjaiMapDataParser(MapDataParser):
     """Ijai map parser."""
@@ -55,7 +65,9 @@ class IjaiMapDataParser(MapDataParser):
                 kwargs['owner_id'], 
                 kwargs['device_id'], 
                 kwargs['model'], 
-                kwargs['device_mac']))
+                kwargs['device_mac']),
+            zlib.MAX_WBITS,
+            _UNPACK_BUFSIZE)
 
     def parse(self, raw: bytes, *args: Any, **kwargs: Any) -> MapData:
         map_data = MapData(0, 1)
@@ -66,9 +78,10 @@ class IjaiMapDataParser(MapDataParser):
         offset1 = buf.get_uint8('offset1') - 1
         
         buf.skip('unknown_hdr1', offset1)
-        _LOGGER.debug(f"Skipping {offset1} bytes, value: {buf.data[buf.offs]:#x}")
+        _LOGGER.debug("Skipping %d bytes, value: %#x", offset1, buf.data[buf.offs])
         
         feature_flags = IjaiMapDataParser.FEATURE_IMAGE
+        pixel_types = None
         map_id = buf.peek_uint32('map_id')
 
 
@@ -79,7 +92,7 @@ class IjaiMapDataParser(MapDataParser):
         if feature_flags & IjaiMapDataParser.FEATURE_IMAGE != 0:
             buf.set_name('image')
             IjaiMapDataParser._parse_section(buf, "image", map_id)
-            map_data.image, map_data.rooms, map_data.cleaned_rooms = self._parse_image(buf)
+            map_data.image, map_data.rooms, map_data.cleaned_rooms, pixel_types = self._parse_image(buf)
 
         if feature_flags & IjaiMapDataParser.FEATURE_HISTORY != 0:
             IjaiMapDataParser._parse_section(buf, "history", map_id)
@@ -129,13 +142,18 @@ class IjaiMapDataParser(MapDataParser):
 
         buf.check_empty()
 
-        if map_data.rooms is not None:
+        if map_data.rooms is not None and _LOGGER.isEnabledFor(logging.DEBUG):
             _LOGGER.debug("rooms: %s", [str(room) for number, room in map_data.rooms.items()])
         if map_data.image is not None and not map_data.image.is_empty:
             self._image_generator.draw_map(map_data)
-            if map_data.rooms is not None and len(map_data.rooms) > 0 and map_data.vacuum_position is not None:
+            if (
+                map_data.rooms is not None
+                and len(map_data.rooms) > 0
+                and map_data.vacuum_position is not None
+                and pixel_types is not None
+            ):
                 vacuum_position_on_image = IjaiMapDataParser._map_to_image(map_data.vacuum_position)
-                map_data.vacuum_room = IjaiImageParser.get_current_vacuum_room(buf, vacuum_position_on_image)
+                map_data.vacuum_room = IjaiImageParser.get_current_vacuum_room(pixel_types, vacuum_position_on_image)
                 if map_data.vacuum_room is not None:
                     map_data.vacuum_room_name = map_data.rooms[map_data.vacuum_room].name
                 _LOGGER.debug("current vacuum room: %s", map_data.vacuum_room)
@@ -146,10 +164,12 @@ class IjaiMapDataParser(MapDataParser):
         return Point(p.x * 20 + 400, p.y * 20 + 400)
 
     @staticmethod
-    def _image_to_map(x: float) -> float:
+    def _image_to_map(x: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
         return (x - 400) / 20
 
-    def _parse_image(self, buf: ParsingBuffer) -> tuple[ImageData, dict[int, Room], set[int]]:
+    def _parse_image(
+        self, buf: ParsingBuffer
+    ) -> tuple[ImageData, dict[int, Room], set[int], npt.NDArray[np.uint8] | None]:
         buf.skip('unknown1', 0x6)
         image_top = 0
         image_left = 0
@@ -159,20 +179,19 @@ class IjaiMapDataParser(MapDataParser):
         buf.skip('unknown3', 0x21)
         image_size = image_height * image_width
         _LOGGER.debug("width: %d, height: %d", image_width, image_height)
-        buf.mark_as_image_beginning()
-        image, rooms_raw, cleaned_areas, cleaned_areas_layer = self._image_parser.parse(buf, image_width, image_height)
+        image, rooms_raw, cleaned_areas, cleaned_areas_layer, pixel_types = self._image_parser.parse(
+            buf, image_width, image_height
+        )
         if image is None:
             image = self._image_generator.create_empty_map_image()
         _LOGGER.debug("img: number of rooms: %d, numbers: %s", len(rooms_raw), rooms_raw.keys())
         rooms = {}
-        for number, room in rooms_raw.items():
-            rooms[number] = Room(
-                IjaiMapDataParser._image_to_map(room[0] + image_left),
-                IjaiMapDataParser._image_to_map(room[1] + image_top),
-                IjaiMapDataParser._image_to_map(room[2] + image_left),
-                IjaiMapDataParser._image_to_map(room[3] + image_top),
-                number,
+        if len(rooms_raw) > 0:
+            rooms_bounds = IjaiMapDataParser._image_to_map(
+                np.array(list(rooms_raw.values()), dtype=np.float64) + (image_left, image_top, image_left, image_top)
             )
+            for number, (x0, y0, x1, y1) in zip(rooms_raw.keys(), rooms_bounds.tolist()):
+                rooms[number] = Room(x0, y0, x1, y1, number)
         return (
             ImageData(
                 image_size,
@@ -187,18 +206,18 @@ class IjaiMapDataParser(MapDataParser):
             ),
             rooms,
             cleaned_areas,
+            pixel_types,
         )
 
     @staticmethod
     def _parse_history(buf: ParsingBuffer) -> Path:
-        path_points = []
         buf.skip("unknown1", 4)
         history_count = buf.get_uint32("history_count")
-        for _ in range(history_count):
-            buf.get_uint8("mode")  # 0: taxi, 1: working
-            position = IjaiMapDataParser._parse_position(buf, "path")
-            if position is not None:
-                path_points.append(position)
+        history = buf.get_array("path", _HISTORY_POINT, history_count)
+        known = (history["x"] != IjaiMapDataParser.POSITION_UNKNOWN) & (
+            history["y"] != IjaiMapDataParser.POSITION_UNKNOWN
+        )
+        path_points = [Point(x, y) for x, y in zip(history["x"][known].tolist(), history["y"][known].tolist())]
         return Path(len(path_points), 1, 0, [path_points])
 
     @staticmethod
@@ -265,8 +284,7 @@ class IjaiMapDataParser(MapDataParser):
         for _ in range(room_count):
             room_id = buf.get_uint32("room.id")
             segment_count = buf.get_uint32("room.segment_count")
-            for _ in range(segment_count):
-                buf.skip("unknown2", 5)
+            buf.skip("unknown2", 5 * segment_count)
             _LOGGER.debug("room#%d: segment_count: %d", room_id, segment_count)
 
     @staticmethod
@@ -287,16 +305,14 @@ class IjaiMapDataParser(MapDataParser):
             return None
         a = None
         if with_angle:
-            a = buf.get_float32(name + ".a") * 180 / math.pi
+            a = buf.get_float32(name + ".a") * _RAD2DEG
         return Point(x, y, a)
 
     @staticmethod
     def _parse_unknown_section(buf: ParsingBuffer) -> bool:
-        n = buf.data[buf.offs :].find(buf.data[4:8])
+        n = buf.data.find(buf.data[4:8], buf.offs, buf.offs + buf.length)
         if n >= 0:
-            buf.offs += n
-            buf.length -= n
+            buf.skip("unknown", n - buf.offs)
             return True
-        buf.offs += buf.length
-        buf.length = 0
+        buf.skip("unknown", buf.length)
         return False
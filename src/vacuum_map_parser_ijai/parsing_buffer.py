@@ -1,96 +1,127 @@
 """Parsing buffer for Viomi map data."""
 
 import logging
-from struct import unpack_from
+from struct import Struct
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
 
 _LOGGER = logging.getLogger(__name__)
 
+_unpack_uint32 = Struct("<L").unpack_from
+_unpack_float32 = Struct("<f").unpack_from
+
 
 class ParsingBuffer:
     """Parsing buffer for Viomi map data."""
 
-    def __init__(self, name: str, data: bytes, start_offs: int, length: int):
-        self._name = name
-        self.data = data
-        self.offs = start_offs
-        self.length = length
-        self._image_beginning: int = 0
+    __slots__ = ("_name", "data", "_view", "offs", "_end")
 
-    def set_name(self, name: str) -> None:
-        self._name = name
-        _LOGGER.debug("SECTION %s: offset 0x%x", self._name, self.offs)
+    def __init__(self, name: str, data: bytes | memoryview, start_offs: int, length: int):
+        self._name: str = name
+        # indexing bytes is cheaper than indexing a memoryview; only data that is not bytes already is copied, once
+        self.data: bytes = data if isinstance(data, bytes) else bytes(data)
+        self.offs: int = start_offs
+        self._end: int = start_offs + length
+        # slicing a memoryview does not copy the underlying map data, and a view of bytes is read-only
+        self._view: memoryview = memoryview(self.data)[: self._end]
 
-    def mark_as_image_beginning(self) -> None:
-        self._image_beginning = self.offs
+    @property
+    def length(self) -> int:
+        return self._end - self.offs
 
-    def get_at_image(self, offset: int) -> int:
-        return self.data[self._image_beginning + offset - 1]
+    def set_name(self, name: str) -> None:
+        self._name = name
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("SECTION %s: offset 0x%x", self._name, self.offs)
 
     def skip(self, field: str, n: int) -> None:
-        if self.length < n:
-            raise ValueError(f"error parsing {self._name}.{field} at offset {self.offs:#x}: buffer underrun")
-        self.offs += n
-        self.length -= n
+        offs = self.offs
+        if offs + n > self._end:
+            raise ValueError(f"error parsing {self._name}.{field} at offset {offs:#x}: buffer underrun")
+        self.offs = offs + n
 
     def get_uint8(self, field: str) -> int:
-        if self.length < 1:
-            raise ValueError(f"error parsing {self._name}.{field} at offset {self.offs:#x}: buffer underrun")
-        self.offs += 1
-        self.length -= 1
-        return self.data[self.offs - 1]
+        offs = self.offs
+        if offs + 1 > self._end:
+            raise ValueError(f"error parsing {self._name}.{field} at offset {offs:#x}: buffer underrun")
+        self.offs = offs + 1
+        return self.data[offs]
 
     def get_uint16(self, field: str) -> int:
-        if self.length < 2:
-            raise ValueError(f"error parsing {self._name}.{field} at offset {self.offs:#x}: buffer underrun")
-        value = self._unpack_int("<H")
-        self.offs += 2
-        self.length -= 2
+        offs = self.offs
+        if offs + 2 > self._end:
+            raise ValueError(f"error parsing {self._name}.{field} at offset {offs:#x}: buffer underrun")
+        data = self.data
+        value = data[offs] | (data[offs + 1] << 8)
+        self.offs = offs + 2
         return value
 
-        
     def get_uint16_remove_parity(self, field: str) -> int:
-        if self.length < 2:
-            raise ValueError(f"error parsing {self._name}.{field} at offset {self._offs:#x}: buffer underrun")
-        lo = self.data[self.offs] 
-        hi = self.data[self.offs + 1]
-        self.offs += 2
-        self.length -= 2
-        return ((hi^1) << 7) ^ lo
-        
+        offs = self.offs
+        if offs + 2 > self._end:
+            raise ValueError(f"error parsing {self._name}.{field} at offset {offs:#x}: buffer underrun")
+        data = self.data
+        lo = data[offs]
+        hi = data[offs + 1]
+        self.offs = offs + 2
+        return ((hi ^ 1) << 7) ^ lo
+
+    def get_uint16_remove_parity_array(self, field: str, count: int) -> npt.NDArray[np.uint16]:
+        raw = self.get_array(field, np.uint8, 2 * count).reshape(count, 2)
+        value: npt.NDArray[np.uint16] = ((raw[:, 1] ^ 1).astype(np.uint16) << 7) ^ raw[:, 0]
+        return value
+
     def get_uint32(self, field: str) -> int:
-        value = self.peek_uint32(field)
-        self.offs += 4
-        self.length -= 4
+        offs = self.offs
+        if offs + 4 > self._end:
+            raise ValueError(f"error parsing {self._name}.{field} at offset {offs:#x}: buffer underrun")
+        value: int = _unpack_uint32(self.data, offs)[0]
+        self.offs = offs + 4
         return value
 
     def get_float32(self, field: str) -> float:
-        if self.length < 4:
-            raise ValueError(f"error parsing {self._name}.{field} at offset {self.offs:#x}: buffer underrun")
-        self.offs += 4
-        self.length -= 4
-        return float(unpack_from("<f", self.data, self.offs - 4)[0])
+        offs = self.offs
+        if offs + 4 > self._end:
+            raise ValueError(f"error parsing {self._name}.{field} at offset {offs:#x}: buffer underrun")
+        value: float = _unpack_float32(self.data, offs)[0]
+        self.offs = offs + 4
+        return value
 
-    def get_string_len8(self, field: str) -> str:
+    def get_bytes(self, field: str, n: int) -> memoryview:
+        """Read n bytes as a view that aliases the buffer data, no copy is made."""
+        offs = self.offs
+        value = self.peek_bytes(field, n)
+        self.offs = offs + n
+        return value
+
+    def get_string_len8(self, field: str, encoding: str = "utf-8") -> str:
         n = self.get_uint8(field + ".len")
-        if self.length < n:
-            raise ValueError(f"error parsing {self._name}.{field} at offset {self.offs:#x}: buffer underrun")
-        self.offs += n
-        self.length -= n
-        return self.data[self.offs - n : self.offs].decode("UTF-8")
+        return self.get_bytes(field, n).tobytes().decode(encoding)
+
+    def get_array(self, field: str, dtype: npt.DTypeLike, count: int) -> npt.NDArray[Any]:
+        """Read count items of dtype as a read-only array sharing memory with the buffer."""
+        dtype = np.dtype(dtype)
+        offs = self.offs
+        if offs + dtype.itemsize * count > self._end:
+            raise ValueError(f"error parsing {self._name}.{field} at offset {offs:#x}: buffer underrun")
+        self.offs = offs + dtype.itemsize * count
+        return np.frombuffer(self._view, dtype=dtype, count=count, offset=offs)
+
+    def peek_bytes(self, field: str, n: int) -> memoryview:
+        """Return the next n bytes as a view that aliases the buffer data, without advancing the offset."""
+        offs = self.offs
+        if offs + n > self._end:
+            raise ValueError(f"error parsing {self._name}.{field} at offset {offs:#x}: buffer underrun")
+        return self._view[offs : offs + n]
 
     def peek_uint32(self, field: str) -> int:
-        if self.length < 4:
-            raise ValueError(f"error parsing {self._name}.{field} at offset {self.offs:#x}: buffer underrun")
-        return self._unpack_int("<L")
+        b = self.peek_bytes(field, 4)
+        return b[0] | (b[1] << 8) | (b[2] << 16) | (b[3] << 24)
 
     def check_empty(self) -> None:
         if self.length == 0:
             _LOGGER.debug("all of the data has been processed")
         else:
             _LOGGER.warning("%d bytes remained in the buffer", self.length)
-
-    def _unpack_int(self, fmt: str) -> int:
-        return int(unpack_from(fmt, self.data, self.offs)[0])
-
-    def _unpack_float(self, fmt: str) -> float:
-        return float(unpack_from(fmt, self.data, self.offs)[0])
@@ -0,0 +1,56 @@
+"""Compiled Ijai map pixel classifier, available when numba is installed."""
+
+from typing import Callable
+
+import numpy as np
+import numpy.typing as npt
+
+
+def _classify_pixels(  # pylint: disable=too-many-positional-arguments
+    pixel_types: npt.NDArray[np.uint8],
+    color_lut: npt.NDArray[np.uint8],
+    room_lut: npt.NDArray[np.uint8],
+    cleaned_lut: npt.NDArray[np.bool_],
+    cleaned_area_color: npt.NDArray[np.uint8],
+    image_rgba: npt.NDArray[np.uint8],
+    cleaned_areas_rgba: npt.NDArray[np.uint8],
+    room_bounds: npt.NDArray[np.int32],
+    cleaned_rooms: npt.NDArray[np.bool_],
+    pixel_counts: npt.NDArray[np.int64],
+) -> None:
+    """Classify every pixel in a single pass.
+
+    Rows of pixel_types are stored bottom-up and are written to image_rgba and cleaned_areas_rgba top-down.
+    room_bounds holds [min_x, min_y, max_x, max_y] per room number in pixel_types coordinates and has to be
+    initialized with an empty box by the caller. cleaned_areas_rgba is left untouched when it has no rows.
+    """
+    height, width = pixel_types.shape
+    draw_cleaned_area = cleaned_areas_rgba.shape[0] > 0
+    for img_y in range(height):
+        y = height - 1 - img_y
+        for x in range(width):
+            pixel_type = pixel_types[img_y, x]
+            pixel_counts[pixel_type] += 1
+            for channel in range(4):
+                image_rgba[y, x, channel] = color_lut[pixel_type, channel]
+            room_number = room_lut[pixel_type]
+            if room_number == 0:
+                continue
+            room_bounds[room_number, 0] = min(room_bounds[room_number, 0], x)
+            room_bounds[room_number, 1] = min(room_bounds[room_number, 1], img_y)
+            room_bounds[room_number, 2] = max(room_bounds[room_number, 2], x)
+            room_bounds[room_number, 3] = max(room_bounds[room_number, 3], img_y)
+            if cleaned_lut[pixel_type]:
+                cleaned_rooms[room_number] = True
+                if draw_cleaned_area:
+                    for channel in range(4):
+                        cleaned_areas_rgba[y, x, channel] = cleaned_area_color[channel]
+
+
+classify_pixels: Callable[..., None] | None
+try:
+    from numba import njit
+except ImportError:
+    classify_pixels = None
+else:
+    classify_pixels = njit(cache=True, nogil=True)(_classify_pixels)
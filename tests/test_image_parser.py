@@ -0,0 +1,124 @@
+"""Tests for the Ijai map image parser on small hand-built maps."""
+
+import logging
+
+import pytest
+
+from vacuum_map_parser_base.config.color import Color, ColorsPalette, SupportedColor
+from vacuum_map_parser_base.config.drawable import Drawable
+from vacuum_map_parser_base.config.image_config import ImageConfig, TrimConfig
+
+from vacuum_map_parser_ijai import image_parser
+from vacuum_map_parser_ijai.image_parser import IjaiImageParser
+from vacuum_map_parser_ijai.parsing_buffer import ParsingBuffer
+
+WALL = IjaiImageParser.MAP_WALL
+SCAN = IjaiImageParser.MAP_SCAN
+OUTSIDE = IjaiImageParser.MAP_OUTSIDE
+NEW_AREA = IjaiImageParser.MAP_NEW_DISCOVERED_AREA
+
+
+@pytest.fixture(params=["vectorized", "compiled"])
+def backend(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> None:
+    if request.param == "vectorized":
+        monkeypatch.setattr(image_parser, "classify_pixels", None)
+    elif image_parser.classify_pixels is None:
+        pytest.skip("numba is not installed")
+
+
+def _rgba(color: Color) -> tuple[int, ...]:
+    return tuple(color) if len(color) == 4 else (*color, 255)
+
+
+def _parse(rows: list[list[int]], image_config: ImageConfig, drawables: list[Drawable]) -> tuple:
+    """Parse rows given bottom-up, the way they are stored in the map data."""
+    height = len(rows)
+    width = len(rows[0])
+    data = bytes(pixel_type for row in rows for pixel_type in row)
+    buf = ParsingBuffer("image", data, 0, len(data))
+    result = IjaiImageParser(ColorsPalette(), image_config, drawables).parse(buf, width, height)
+    assert buf.length == 0
+    return result
+
+
+@pytest.mark.usefixtures("backend")
+def test_rows_are_flipped_top_down() -> None:
+    palette = ColorsPalette()
+    bottom_row = [WALL, SCAN, OUTSIDE]
+    top_row = [10, 60, NEW_AREA]
+
+    image, rooms, cleaned_areas, cleaned_areas_layer, _ = _parse([bottom_row, top_row], ImageConfig(), [])
+
+    assert image.mode == "RGBA"
+    assert image.size == (3, 2)
+    assert [image.getpixel((x, 0)) for x in range(3)] == [
+        _rgba(palette.get_room_color(10)),
+        _rgba(palette.get_room_color(10)),
+        _rgba(palette.get_color(SupportedColor.NEW_DISCOVERED_AREA)),
+    ]
+    assert [image.getpixel((x, 1)) for x in range(3)] == [
+        _rgba(palette.get_color(SupportedColor.MAP_WALL_V2)),
+        _rgba(palette.get_color(SupportedColor.SCAN)),
+        _rgba(palette.get_color(SupportedColor.MAP_OUTSIDE)),
+    ]
+    assert rooms == {10: (0, 1, 1, 1)}
+    assert cleaned_areas == {10}
+    assert cleaned_areas_layer is None
+
+
+@pytest.mark.usefixtures("backend")
+def test_trimmed_rooms_and_cleaned_areas() -> None:
+    palette = ColorsPalette()
+    rows = [[OUTSIDE] * 10 for _ in range(10)]
+    rows[0][0] = 13  # trimmed away
+    rows[4][3] = 11
+    rows[6][5] = 11
+    rows[2][8] = 62  # selected room 12
+    # trims 2 columns on the left, 1 on the right, 2 rows at the bottom and 1 at the top
+    image_config = ImageConfig(trim=TrimConfig(left=20, right=10, top=10, bottom=20))
+
+    image, rooms, cleaned_areas, cleaned_areas_layer, _ = _parse(rows, image_config, [Drawable.CLEANED_AREA])
+
+    assert image.size == (7, 7)
+    # bounds are reported in untrimmed map coordinates
+    assert rooms == {11: (3, 4, 5, 6), 12: (8, 2, 8, 2)}
+    assert cleaned_areas == {12}
+    assert cleaned_areas_layer.size == (7, 7)
+    cleaned_area_color = _rgba(palette.get_color(SupportedColor.CLEANED_AREA))
+    layer_pixels = {(x, y): cleaned_areas_layer.getpixel((x, y)) for x in range(7) for y in range(7)}
+    assert {xy for xy, color in layer_pixels.items() if color != (0, 0, 0, 0)} == {(6, 6)}
+    assert layer_pixels[(6, 6)] == cleaned_area_color
+    assert image.getpixel((6, 6)) == _rgba(palette.get_room_color(12))
+    assert image.getpixel((1, 4)) == _rgba(palette.get_room_color(11))
+
+
+@pytest.mark.usefixtures("backend")
+def test_unknown_pixel_types_are_reported(caplog: pytest.LogCaptureFixture) -> None:
+    palette = ColorsPalette()
+
+    with caplog.at_level(logging.WARNING, logger=image_parser.__name__):
+        image, rooms, _, _, _ = _parse([[3, WALL], [200, 3]], ImageConfig(), [])
+
+    assert [(record.msg, record.args) for record in caplog.records] == [("unknown pixel_types: %s", ({3, 200},))]
+    assert image.getpixel((0, 1)) == _rgba(palette.get_color(SupportedColor.UNKNOWN))
+    assert image.getpixel((0, 0)) == _rgba(palette.get_color(SupportedColor.UNKNOWN))
+    assert rooms == {}
+
+
+@pytest.mark.usefixtures("backend")
+def test_scaled_output_size() -> None:
+    rows = [[WALL, 10, 60, SCAN] for _ in range(3)]
+    image_config = ImageConfig(scale=2.5, trim=TrimConfig(left=25))
+
+    image, rooms, _, cleaned_areas_layer, _ = _parse(rows, image_config, [Drawable.CLEANED_AREA])
+
+    assert image.size == (7, 7)
+    assert cleaned_areas_layer.size == (7, 7)
+    assert rooms == {10: (1, 0, 2, 2)}
+
+
+def test_fully_trimmed_map() -> None:
+    buf = ParsingBuffer("image", bytes([WALL, WALL]), 0, 2)
+    parser = IjaiImageParser(ColorsPalette(), ImageConfig(trim=TrimConfig(left=50, right=50)), [])
+
+    assert parser.parse(buf, 2, 1) == (None, {}, set(), None, None)
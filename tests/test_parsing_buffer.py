@@ -0,0 +1,53 @@
+"""Tests for the parsing buffer."""
+
+import numpy as np
+import pytest
+
+from vacuum_map_parser_ijai.parsing_buffer import ParsingBuffer
+
+
+@pytest.mark.parametrize("data", [bytes(range(8)), bytearray(range(8)), memoryview(bytearray(range(8)))])
+def test_get_array_is_read_only(data: bytes | bytearray | memoryview) -> None:
+    buf = ParsingBuffer("test", data, 2, 4)
+
+    array = buf.get_array("values", np.uint8, 4)
+
+    assert array.tolist() == [2, 3, 4, 5]
+    assert not array.flags.writeable
+    with pytest.raises(ValueError):
+        array[0] = 0
+    assert buf.length == 0
+
+
+def test_get_array_underrun() -> None:
+    buf = ParsingBuffer("test", bytes(8), 2, 4)
+
+    with pytest.raises(ValueError, match="test.values at offset 0x2: buffer underrun"):
+        buf.get_array("values", np.uint16, 3)
+    assert buf.offs == 2
+
+
+def test_get_uint16_remove_parity_array_matches_scalar() -> None:
+    # every (lo, hi) pair, including the ones with the parity bit in hi unset
+    data = bytes(value for lo in range(256) for hi in (0, 1, 2, 255) for value in (lo, hi))
+    scalar_buf = ParsingBuffer("test", data, 0, len(data))
+    array_buf = ParsingBuffer("test", data, 0, len(data))
+
+    expected = [scalar_buf.get_uint16_remove_parity("value") for _ in range(len(data) // 2)]
+    values = array_buf.get_uint16_remove_parity_array("values", len(data) // 2)
+
+    assert values.dtype == np.uint16
+    assert values.tolist() == expected
+    assert array_buf.offs == scalar_buf.offs == len(data)
+
+
+def test_get_uint16_remove_parity_array_underrun() -> None:
+    buf = ParsingBuffer("test", bytes(8), 2, 5)
+
+    with pytest.raises(ValueError, match="test.values at offset 0x2: buffer underrun"):
+        buf.get_uint16_remove_parity_array("values", 3)
+    assert buf.offs == 2
+    buf.skip("head", 4)
+    with pytest.raises(ValueError, match="test.value at offset 0x6: buffer underrun"):
+        buf.get_uint16_remove_parity("value")
+    assert buf.offs == 6
@@ -0,0 +1,51 @@
+"""Checks that the compiled and the vectorized pixel classifiers produce identical results."""
+
+# pylint: disable=protected-access
+
+import numpy as np
+import pytest
+
+from vacuum_map_parser_base.config.color import ColorsPalette
+from vacuum_map_parser_base.config.image_config import ImageConfig
+
+from vacuum_map_parser_ijai.image_parser import IjaiImageParser
+from vacuum_map_parser_ijai.pixel_classifier import classify_pixels
+
+# known pixel types (outside, scan, new area, wall, rooms and selected rooms) along with a few unknown ones
+_PIXEL_TYPES = np.array([0, 1, 2, 3, 200, 255] + list(range(10, 20)) + list(range(60, 70)), dtype=np.uint8)
+
+
+def _random_pixel_types(rng: np.random.Generator, width: int, height: int) -> np.ndarray:
+    # blocks of a single pixel type give rooms some structure, noise covers single-pixel rooms
+    blocks = rng.choice(_PIXEL_TYPES, size=(height // 5 + 1, width // 7 + 1))
+    pixel_types = np.repeat(np.repeat(blocks, 5, axis=0), 7, axis=1)[:height, :width]
+    noise = rng.random((height, width)) < 0.05
+    pixel_types[noise] = rng.choice(_PIXEL_TYPES, size=int(noise.sum()))
+    return pixel_types
+
+
+@pytest.mark.skipif(classify_pixels is None, reason="numba is not installed")
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("draw_cleaned_area", [True, False])
+def test_classifiers_match(seed: int, draw_cleaned_area: bool) -> None:
+    rng = np.random.default_rng(seed)
+    width, height = (int(n) for n in rng.integers(1, 120, size=2))
+    pixel_types = _random_pixel_types(rng, width, height)
+    trim_left, trim_right = (int(n) for n in rng.integers(0, width // 4 + 1, size=2))
+    trim_bottom, trim_top = (int(n) for n in rng.integers(0, height // 4 + 1, size=2))
+    # a trimmed, non-contiguous view like the one IjaiImageParser.parse passes to the classifiers
+    trimmed = pixel_types[trim_bottom:height - trim_top, trim_left:width - trim_right]
+    parser = IjaiImageParser(ColorsPalette(), ImageConfig(), [])
+
+    compiled = parser._classify_compiled(classify_pixels, trimmed, draw_cleaned_area)
+    vectorized = parser._classify_vectorized(trimmed, draw_cleaned_area)
+
+    image_compiled, rooms_compiled, cleaned_compiled, layer_compiled, present_compiled = compiled
+    image_vectorized, rooms_vectorized, cleaned_vectorized, layer_vectorized, present_vectorized = vectorized
+    np.testing.assert_array_equal(image_compiled, image_vectorized)
+    assert rooms_compiled == rooms_vectorized
+    assert cleaned_compiled == cleaned_vectorized
+    assert (layer_compiled is None) == (layer_vectorized is None) == (not draw_cleaned_area)
+    if layer_compiled is not None:
+        np.testing.assert_array_equal(layer_compiled, layer_vectorized)
+    assert present_compiled == present_vectorized